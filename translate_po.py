@@ -15,6 +15,11 @@ Odoo模块翻译工具 - 将POT文件自动翻译成中文(zh_CN.po)的Python工
    
    # 安装必要的包
    pip install googletrans==3.1.0a0
+   
+   # （可选）使用Google Cloud Translation官方API
+   pip install google-cloud-translate
+   export GOOGLE_APPLICATION_CREDENTIALS=/path/to/service-account.json
+   export GOOGLE_CLOUD_PROJECT=your-project-id  # 不设置时使用凭据所属的项目
 
 2. 准备翻译模板:
    # 对于非Odoo原生的第三方应用或模块:
@@ -52,13 +57,159 @@ Odoo模块翻译工具 - 将POT文件自动翻译成中文(zh_CN.po)的Python工
 7. 程序会保持英文引号格式，不会将引号转换为中文引号
 8. 程序会保留已有的翻译内容，不会重复翻译或覆盖已翻译的词条
 9. 程序会保持原文中换行符(\n)的格式不变
+10. 翻译结果会缓存在 ~/.cache/odoo_translate/en_zh.sqlite 中，不同模块和多次运行之间
+    相同的词条不会重复请求翻译；删除该文件即可清空缓存
+    运行前会读取目录下所有模块已有的zh_CN.po，其中的翻译会直接用于其他模块的相同词条
+11. 支持跨多行书写的msgid/msgstr；复数形式(msgid_plural)的词条不会自动翻译，需要手动处理
+12. 设置了 GOOGLE_APPLICATION_CREDENTIALS 且安装了 google-cloud-translate 时使用官方
+    Cloud Translation API（每次请求最多1024个词条），否则使用googletrans
 """
 import re
 from googletrans import Translator
 import time
 import os
 import argparse
-import glob
+import gettext
+import mmap
+import sqlite3
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+
+# Google Cloud Translation官方API为可选依赖，未安装时使用googletrans
+try:
+    import google.auth
+    from google.cloud import translate_v3
+except ImportError:
+    translate_v3 = None
+
+# 单次翻译请求的最大字符数（Google翻译单次请求上限约为5000字符，此处预留余量）
+MAX_BATCH_CHARS = 4500
+# Cloud Translation API单次请求的最大词条数和字符数
+CLOUD_MAX_BATCH_ITEMS = 1024
+CLOUD_MAX_BATCH_CHARS = 30000
+# 批量翻译时用于拼接词条的分隔标记
+BATCH_SEPARATOR = '\n@@@\n'
+# 拆分翻译结果时使用的正则（Google可能会改动分隔标记两侧的空白）
+BATCH_SPLIT_PATTERN = re.compile(r'\s*@@@\s*')
+# 同时进行的翻译请求数（所有模块共享，Google翻译建议每秒不超过5个请求）
+MAX_CONCURRENT_REQUESTS = 5
+# 每秒最多发出的翻译请求数
+REQUESTS_PER_SECOND = 5
+# 请求被限流(HTTP 429)时的最大尝试次数和最长等待时间（秒）
+MAX_RETRIES = 5
+MAX_RETRY_DELAY = 60
+# 同时翻译的模块数
+MAX_PARALLEL_MODULES = 4
+# 翻译缓存数据库路径，已翻译的词条会在不同模块和多次运行之间复用
+CACHE_PATH = os.path.expanduser("~/.cache/odoo_translate/en_zh.sqlite")
+
+# PO文件中一个带引号的字符串（允许包含 \" 等转义字符）
+_PO_STRING = r'"(?:[^"\\\n]|\\.)*"'
+# 匹配一个msgid/msgstr词条，两者都可以跨多行书写；复数形式(msgid_plural)的词条不会匹配
+# PO文件以内存映射方式读取，因此以下文件内容相关的正则都作用于bytes；
+# 文件以二进制方式读取，换行符可能是\r\n，行尾的\r不计入匹配内容，写回时原样保留
+ENTRY_PATTERN = re.compile(
+    (rf'^msgid (?P<msgid>{_PO_STRING}(?:\r?\n{_PO_STRING})*)(?P<eol>\r?)\n'
+     rf'msgstr (?P<msgstr>{_PO_STRING}(?:\r?\n{_PO_STRING})*)(?=\r?$)').encode(),
+    re.MULTILINE)
+# 文件头中的Project-Id-Version行，用于在其后插入语言信息
+HEADER_PROJECT_PATTERN = re.compile(rb'^"Project-Id-Version: .*"(?=\r?$)', re.MULTILINE)
+# 文件头中已有的Language行
+HEADER_LANGUAGE_PATTERN = re.compile(rb'^"Language: .*"(?=\r?$)', re.MULTILINE)
+# 翻译结果中需要转义的字符：已是合法PO转义的(\\、\"、\n、\t、\r)保持不变，
+# 其余的反斜杠、双引号和真实换行符需要转义
+ESCAPE_PATTERN = re.compile(r'\\[\\"ntr]|[\\"\n]')
+# 需要转义的字符及转义后的写法
+ESCAPE_MAP = {'\\': '\\\\', '"': '\\"', '\n': '\\n'}
+
+# 包含这些字符的文本视为Python代码或HTML/XML标签（如 style=、</），不翻译
+_REJECT_CHARS = frozenset('()_{}+=[]<>/')
+# 删除数字和常见符号的转换表，用于识别纯数字或符号的文本
+_NUMERIC_TABLE = str.maketrans('', '', '0123456789.,:-_/\\')
+
+class RateLimiter:
+    """
+    滑动窗口限流器，保证任意 per 秒内最多发出 rate 个请求（线程安全）
+    
+    Args:
+        rate (int): 时间窗口内允许的最大请求数
+        per (float): 时间窗口长度（秒）
+    """
+    def __init__(self, rate, per=1.0):
+        self.rate = rate
+        self.per = per
+        self._timestamps = deque()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """
+        获取一次请求许可，只有在窗口内请求数已达上限时才等待
+        """
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                # 移除已经滑出时间窗口的请求记录
+                while self._timestamps and now - self._timestamps[0] >= self.per:
+                    self._timestamps.popleft()
+                if len(self._timestamps) < self.rate:
+                    self._timestamps.append(now)
+                    return
+                time.sleep(self.per - (now - self._timestamps[0]))
+
+# 翻译结果，与googletrans返回的对象一样通过text属性获取译文
+Translated = namedtuple('Translated', ['text'])
+
+class CloudTranslator:
+    """
+    Google Cloud Translation v3 API的封装，translate方法与googletrans的Translator用法一致
+    
+    凭据通过GOOGLE_APPLICATION_CREDENTIALS指定，项目ID优先读取GOOGLE_CLOUD_PROJECT，
+    否则使用凭据所属的项目
+    """
+    def __init__(self):
+        credentials, project_id = google.auth.default()
+        project_id = os.getenv('GOOGLE_CLOUD_PROJECT') or project_id
+        self.client = translate_v3.TranslationServiceClient(credentials=credentials)
+        self.parent = f"projects/{project_id}/locations/global"
+    
+    def translate(self, text, dest='zh-cn', src='en'):
+        """
+        翻译一个或一组文本，一组文本只发送一次请求
+        
+        Args:
+            text (str | list): 待翻译的文本或文本列表
+            dest (str): 目标语言代码
+            src (str): 源语言代码
+            
+        Returns:
+            Translated | list: 与text对应的翻译结果
+        """
+        contents = text if isinstance(text, list) else [text]
+        # Cloud Translation API使用 zh-CN 形式的语言代码
+        language, _, region = dest.partition('-')
+        response = self.client.translate_text(request={
+            'parent': self.parent,
+            'contents': contents,
+            'mime_type': 'text/plain',
+            'source_language_code': src,
+            'target_language_code': f"{language}-{region.upper()}" if region else language,
+        })
+        results = [Translated(t.translated_text) for t in response.translations]
+        return results if isinstance(text, list) else results[0]
+
+# 限制所有线程中同时进行的翻译请求数
+_request_semaphore = threading.Semaphore(MAX_CONCURRENT_REQUESTS)
+# 限制所有线程每秒发出的翻译请求数
+_limiter = RateLimiter(REQUESTS_PER_SECOND)
+# 所有模块共用的翻译状态，使并行翻译的多个模块中相同的词条只请求一次：
+# 正在翻译的词条 msgid -> Event（翻译结束时设置），已完成的翻译 msgid -> 译文
+_translation_events = {}
+_translation_results = {}
+_translation_lock = threading.Lock()
+# 并行翻译的模块逐条输出信息时使用的锁
+_print_lock = threading.Lock()
 
 def find_pot_files(base_dir):
     """
@@ -73,167 +224,621 @@ def find_pot_files(base_dir):
     pot_files = []
     
     # 查找所有可能的Odoo模块目录（包含__manifest__.py的目录）
-    for manifest_path in glob.glob(os.path.join(base_dir, "*/__manifest__.py")):
-        module_dir = os.path.dirname(manifest_path)
-        module_name = os.path.basename(module_dir)
-        i18n_dir = os.path.join(module_dir, "i18n")
-        
-        # 检查是否存在i18n目录
-        if os.path.exists(i18n_dir):
-            # 查找POT文件
-            pot_path = os.path.join(i18n_dir, f"{module_name}.pot")
-            if os.path.exists(pot_path):
-                pot_files.append((module_dir, pot_path))
+    with os.scandir(base_dir) as it:
+        for entry in it:
+            # 跳过普通文件和隐藏目录
+            if entry.name.startswith('.') or not entry.is_dir():
+                continue
+            if not os.path.isfile(os.path.join(entry.path, "__manifest__.py")):
+                continue
+                
+            # 检查i18n目录中是否存在POT文件
+            pot_path = os.path.join(entry.path, "i18n", f"{entry.name}.pot")
+            if os.path.isfile(pot_path):
+                pot_files.append((entry.path, pot_path))
     
     return pot_files
 
+def unquote(block):
+    """
+    将PO文件中一行或多行带引号的字符串拼接成一个字符串
+    
+    转义字符（如 \\n、\\"）保持原样，拼接结果可以直接写回PO文件
+    
+    Args:
+        block (bytes): msgid或msgstr后面的一行或多行带引号的字符串
+        
+    Returns:
+        str: 去掉引号并拼接后解码得到的字符串
+    """
+    return b''.join(line[1:-1] for line in block.splitlines()).decode('utf-8')
+
+def escape_translation(text):
+    """
+    转义翻译结果中的特殊字符，使其可以写入PO文件的一对引号中
+    
+    已经按PO格式转义过的内容（如缓存中来自zh_CN.po的翻译）不会被重复转义
+    
+    Args:
+        text (str): 翻译结果
+        
+    Returns:
+        str: 转义后的字符串
+        
+    Examples:
+        >>> print(escape_translation('说 "你好"'))
+        说 \\"你好\\"
+        >>> print(escape_translation('已转义\\\\n和\\\\"'))
+        已转义\\n和\\"
+        >>> print(escape_translation('结尾\\\\'))
+        结尾\\\\
+    """
+    # 未转义的双引号会提前结束字符串，单独的反斜杠会转义后面的引号，真实换行符会破坏PO文件格式
+    return ESCAPE_PATTERN.sub(lambda m: ESCAPE_MAP.get(m.group(0), m.group(0)), text)
+
+def set_language_header(content):
+    """
+    在PO文件头中写入语言信息(Language: zh_CN)
+    
+    Args:
+        content (bytes): PO文件头（msgid为空的词条）
+        
+    Returns:
+        bytes: 修改后的文件头
+    """
+    language_line = b'"Language: zh_CN\\n"'
+    if HEADER_LANGUAGE_PATTERN.search(content):
+        return HEADER_LANGUAGE_PATTERN.sub(lambda m: language_line, content, count=1)
+    eol = b'\r\n' if b'\r\n' in content else b'\n'
+    return HEADER_PROJECT_PATTERN.sub(lambda m: m.group(0) + eol + language_line, content, count=1)
+
+def load_po_translations(po_file):
+    """
+    从PO文件中读取已有的翻译
+    
+    Args:
+        po_file (str): PO文件路径
+        
+    Returns:
+        dict: 以msgid为键、msgstr为值的字典，只包含非空翻译
+    """
+    translations = {}
+    # 空文件无法建立内存映射，也没有可读取的翻译
+    if not os.path.getsize(po_file):
+        return translations
+    with open(po_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+        # 提取现有的msgid和msgstr对
+        for match in ENTRY_PATTERN.finditer(content):
+            msgid = unquote(match.group('msgid'))
+            msgstr = unquote(match.group('msgstr'))
+            if msgid and msgstr:  # 只保存非空翻译
+                translations[msgid] = msgstr
+    return translations
+
+def load_mo_translations(mo_file):
+    """
+    从编译后的MO文件中读取已有的翻译，比解析PO文件更快
+    
+    Args:
+        mo_file (str): MO文件路径
+        
+    Returns:
+        dict: 与load_po_translations格式相同（字符串已按PO格式转义）的翻译字典
+    """
+    def escape(text):
+        return (text.replace('\\', '\\\\').replace('"', '\\"')
+                .replace('\n', '\\n').replace('\t', '\\t'))
+    
+    with open(mo_file, 'rb') as f:
+        catalog = gettext.GNUTranslations(f)._catalog
+    
+    translations = {}
+    for msgid, msgstr in catalog.items():
+        # 跳过复数形式的词条（键为元组）和文件头
+        if not isinstance(msgid, str) or not msgid or not msgstr:
+            continue
+        # 带msgctxt的词条以 "上下文\x04msgid" 作为键
+        msgid = msgid.split('\x04')[-1]
+        translations[escape(msgid)] = escape(msgstr)
+    return translations
+
+def load_existing_translations(po_file):
+    """
+    读取PO文件对应的已有翻译
+    
+    同目录下存在不早于PO文件的MO文件时直接读取MO文件，否则（或MO文件无法读取时）解析PO文件
+    
+    Args:
+        po_file (str): PO文件路径
+        
+    Returns:
+        dict: 以msgid为键、msgstr为值的字典，只包含非空翻译
+    """
+    mo_file = os.path.splitext(po_file)[0] + '.mo'
+    if os.path.exists(mo_file) and os.path.getmtime(mo_file) >= os.path.getmtime(po_file):
+        try:
+            return load_mo_translations(mo_file)
+        except (OSError, UnicodeDecodeError) as e:
+            # MO文件损坏或缺少字符集声明时改为解析PO文件
+            print(f"无法读取MO文件 {mo_file}，改为解析PO文件: {str(e)}")
+    return load_po_translations(po_file)
+
+def open_cache(cache_path=CACHE_PATH):
+    """
+    打开翻译缓存数据库，不存在时自动创建
+    
+    Args:
+        cache_path (str): 缓存数据库文件路径
+        
+    Returns:
+        sqlite3.Connection: 数据库连接
+    """
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    conn = sqlite3.connect(cache_path, timeout=30)
+    conn.execute('CREATE TABLE IF NOT EXISTS cache (en TEXT PRIMARY KEY, zh TEXT)')
+    return conn
+
+def load_module_translations(pot_files):
+    """
+    读取所有模块已有的zh_CN.po翻译，合并成一个字典供各模块共用
+    
+    Args:
+        pot_files (list): find_pot_files返回的(模块路径, pot文件路径)列表
+        
+    Returns:
+        dict: 以msgid为键、msgstr为值的字典，只包含非空翻译
+    """
+    translations = {}
+    for module_dir, pot_path in pot_files:
+        po_path = os.path.join(module_dir, "i18n", "zh_CN.po")
+        if not os.path.exists(po_path):
+            continue
+        try:
+            translations.update(load_existing_translations(po_path))
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            # 单个文件无法读取时跳过，不影响其他模块
+            print(f"读取翻译文件失败，已跳过: {po_path}: {str(e)}")
+    return translations
+
+def seed_cache(translations, cache_path=CACHE_PATH):
+    """
+    将已有的翻译写入缓存，供之后的运行复用
+    
+    Args:
+        translations (dict): 以msgid为键、msgstr为值的字典
+        cache_path (str): 缓存数据库文件路径
+    """
+    conn = open_cache(cache_path)
+    try:
+        with conn:
+            conn.executemany('INSERT OR REPLACE INTO cache (en, zh) VALUES (?, ?)',
+                             translations.items())
+    finally:
+        conn.close()
+
+@lru_cache(maxsize=None)
 def should_translate(text):
     """
-    判断文本是否需要翻译
+    判断文本是否需要翻译（结果会被缓存，相同的文本只判断一次）
     
     Args:
         text (str): 待判断的文本
         
     Returns:
         bool: True表示需要翻译，False表示不需要翻译
+        
+    Examples:
+        >>> should_translate('Customer')
+        True
+        >>> should_translate('<p>x</p>')
+        False
+        >>> should_translate('<span style="color: red">Warning</span>')
+        False
+        >>> should_translate('partner_id')
+        False
+        >>> should_translate('12.50')
+        False
     """
     # 空字符串不翻译
     if not text:
         return False
         
-    # 包含Python代码的不翻译
-    if any(code_sign in text for code_sign in [
-        '(', ')', '_', '{', '}', '+', '=', '[', ']'
-    ]):
-        return False
-        
-    包含HTML/XML标签的不翻译
-    if any(html_sign in text for html_sign in [
-        '<', '>', '/', '</', '/>', 'style=', 'class='
-    ]):
+    # 包含Python代码或HTML/XML标签的不翻译
+    if not _REJECT_CHARS.isdisjoint(text):
         return False
         
-    # 纯数字或符号的不翻译
-    if all(char.isdigit() or char in '.,:-_/\\' for char in text.strip()):
+    # 纯数字或符号的不翻译（删除数字和符号后没有剩余字符）
+    if not text.strip().translate(_NUMERIC_TABLE):
         return False
         
     return True
 
-def translate_po_file(input_file, output_file):
+def clean_translation(text):
+    """
+    整理翻译结果的格式
+    
+    Args:
+        text (str): 翻译接口返回的文本
+        
+    Returns:
+        str: 引号与换行符格式修正后的文本
+    """
+    # 将翻译结果中的中文引号替换回英文引号
+    text = text.replace('“', '"').replace('”', '"')
+    text = text.replace('‘', "'").replace('’', "'")
+
+    # 修复换行符，确保保持 \n 的格式
+    text = text.replace('\\ n', '\n').replace(' \n', '\n')
+    
+    return text
+
+def split_batches(texts, max_chars=MAX_BATCH_CHARS, max_items=None):
+    """
+    将待翻译的文本按单次请求的字符数上限分组
+    
+    Args:
+        texts (list): 待翻译的文本列表
+        max_chars (int): 每组拼接后的最大字符数
+        max_items (int): 每组的最大词条数，None表示不限制
+        
+    Returns:
+        list: 分组后的文本列表，每项为一组文本组成的列表
+    """
+    batches = []
+    current_batch = []
+    current_size = 0
+    
+    for text in texts:
+        size = len(text) + (len(BATCH_SEPARATOR) if current_batch else 0)
+        # 超出上限时开始新的一组（单条超长文本单独成组）
+        if current_batch and (current_size + size > max_chars
+                              or len(current_batch) == max_items):
+            batches.append(current_batch)
+            current_batch = []
+            current_size = 0
+            size = len(text)
+        current_batch.append(text)
+        current_size += size
+        
+    if current_batch:
+        batches.append(current_batch)
+    
+    return batches
+
+def is_rate_limited(error):
+    """
+    判断异常是否由请求过于频繁(HTTP 429)引起
+    
+    Args:
+        error (Exception): 翻译请求抛出的异常
+        
+    Returns:
+        bool: True表示被限流，可以稍后重试
+    """
+    message = str(error)
+    return '429' in message or 'Too Many' in message
+
+def get_retry_delay(error, attempt):
+    """
+    计算被限流后重试前需要等待的秒数
+    
+    响应中带有Retry-After头时按其等待，否则按指数退避（1、2、4、8...秒）
+    
+    Args:
+        error (Exception): 翻译请求抛出的异常
+        attempt (int): 已失败的次数（从0开始）
+        
+    Returns:
+        int: 等待的秒数，不超过MAX_RETRY_DELAY
+    """
+    response = getattr(error, 'response', None)
+    retry_after = getattr(response, 'headers', {}).get('Retry-After', '')
+    if retry_after.isdigit():
+        return min(MAX_RETRY_DELAY, int(retry_after))
+    return min(MAX_RETRY_DELAY, 2 ** attempt)
+
+def request_translation(translator, text):
+    """
+    调用翻译接口将文本翻译成中文，受并发数和请求频率限制，被限流时自动重试
+    
+    Args:
+        translator (Translator | CloudTranslator): 翻译器实例
+        text (str | list): 待翻译的文本，CloudTranslator可以传入文本列表
+        
+    Returns:
+        str | list: 翻译接口返回的文本，传入列表时返回对应的列表
+    """
+    for attempt in range(MAX_RETRIES):
+        try:
+            with _request_semaphore:
+                _limiter.acquire()
+                result = translator.translate(text, dest='zh-cn')
+            return [r.text for r in result] if isinstance(text, list) else result.text
+        except Exception as e:
+            # 非限流错误或重试次数用尽时直接抛出
+            if not is_rate_limited(e) or attempt == MAX_RETRIES - 1:
+                raise
+            delay = get_retry_delay(e, attempt)
+            with _print_lock:
+                print(f"请求过于频繁，{delay} 秒后重试 ({attempt + 1}/{MAX_RETRIES - 1})")
+            time.sleep(delay)
+
+def translate_batch(translator, texts):
+    """
+    将一组文本通过一次请求翻译成中文
+    
+    CloudTranslator直接发送文本列表，googletrans则将文本用分隔标记拼接后发送
+    
+    Args:
+        translator (Translator | CloudTranslator): 翻译器实例
+        texts (list): 待翻译的文本列表
+        
+    Returns:
+        list: 与texts一一对应的翻译结果
+    """
+    if isinstance(translator, CloudTranslator):
+        return [clean_translation(part) for part in request_translation(translator, texts)]
+        
+    translated = request_translation(translator, BATCH_SEPARATOR.join(texts))
+    parts = BATCH_SPLIT_PATTERN.split(translated.strip())
+    
+    # 分隔标记被翻译接口改动时无法对应结果，改为逐条翻译
+    if len(parts) != len(texts):
+        parts = [request_translation(translator, text) for text in texts]
+    
+    return [clean_translation(part) for part in parts]
+
+def claim_translations(texts):
+    """
+    认领需要翻译的词条，其他模块已完成或正在翻译的词条不重复认领
+    
+    Args:
+        texts (list): 待翻译的文本列表
+        
+    Returns:
+        tuple: (本模块需要请求翻译的词条列表,
+                其他模块正在翻译的词条及其完成事件的字典,
+                其他模块已完成的翻译字典)
+    """
+    claimed = []
+    waiting = {}
+    finished = {}
+    with _translation_lock:
+        for text in texts:
+            if text in _translation_results:
+                finished[text] = _translation_results[text]
+            elif text in _translation_events:
+                waiting[text] = _translation_events[text]
+            else:
+                _translation_events[text] = threading.Event()
+                claimed.append(text)
+    return claimed, waiting, finished
+
+def release_translations(texts, translations):
+    """
+    结束对词条的认领并通知等待的模块
+    
+    翻译成功的词条记录结果供其他模块使用，失败的词条可以被其他模块重新认领
+    
+    Args:
+        texts (list): claim_translations认领的词条列表
+        translations (dict): 本模块的翻译结果
+    """
+    with _translation_lock:
+        for text in texts:
+            if text in translations:
+                _translation_results[text] = translations[text]
+            _translation_events.pop(text).set()
+
+def create_translator():
+    """
+    创建翻译器实例，整个运行过程中所有模块共用一个实例
+    
+    设置了GOOGLE_APPLICATION_CREDENTIALS且安装了google-cloud-translate时使用官方
+    Cloud Translation API，否则使用googletrans
+    
+    Returns:
+        Translator | CloudTranslator: 翻译器实例
+    """
+    if os.getenv('GOOGLE_APPLICATION_CREDENTIALS'):
+        if translate_v3 is not None:
+            return CloudTranslator()
+        print("已设置GOOGLE_APPLICATION_CREDENTIALS，但未安装google-cloud-translate，改用googletrans")
+    # 请求失败时抛出异常，而不是把原文当作译文返回；服务地址使用默认的
+    # translate.googleapis.com，不需要token，且只有一个地址，HTTP连接可以复用
+    return Translator(raise_exception=True)
+
+def close_translator(translator):
+    """
+    关闭翻译器使用的HTTP连接
+    
+    Args:
+        translator (Translator | CloudTranslator): 翻译器实例
+    """
+    if isinstance(translator, CloudTranslator):
+        translator.client.transport.close()
+    else:
+        translator.client.close()
+
+def translate_po_file(input_file, output_file, translator, shared_translations=None, log=print):
     """
     将PO文件从英文翻译成中文
     
     Args:
         input_file (str): 输入文件路径
         output_file (str): 输出文件路径
+        translator (Translator | CloudTranslator): 翻译器实例，由create_translator创建
+        shared_translations (dict): 其他模块已有的翻译，由load_module_translations读取
+        log (callable): 输出进度和统计信息的函数，默认直接打印
     """
     # 检查输入文件是否存在
     if not os.path.exists(input_file):
         raise FileNotFoundError(f"输入文件不存在: {input_file}")
     
-    # 读取现有的翻译（如果存在）
-    existing_translations = {}
+    # 读取现有的翻译（如果存在），本模块的翻译优先于其他模块的翻译
+    existing_translations = dict(shared_translations or {})
+    module_translations = {}
     if os.path.exists(output_file):
-        print(f"发现现有翻译文件: {output_file}")
-        with open(output_file, 'r', encoding='utf-8') as f:
-            existing_content = f.read()
-            # 提取现有的msgid和msgstr对
-            existing_pairs = re.finditer(r'msgid "(.*?)"\nmsgstr "(.*?)"', existing_content, re.DOTALL)
-            for pair in existing_pairs:
-                if pair.group(1) and pair.group(2):  # 只保存非空翻译
-                    existing_translations[pair.group(1)] = pair.group(2)
-        print(f"已加载 {len(existing_translations)} 个现有翻译")
-        
-    # 读取源文件
-    with open(input_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # 创建翻译器实例
-    translator = Translator()
-    
-    # 使用正则表达式，匹配所有msgid和msgstr对
-    pattern = r'(msgid ")(.*?)(")\n(msgstr ")(.*?)(")'
-    
-    def translate_match(match):
-        nonlocal current_count
-        english_text = match.group(2)
-        existing_translation = match.group(5)
-        
-        # 如果是空字符串，直接返回原文
-        if not english_text:
-            return match.group(0)
-            
-        # 如果在现有翻译中找到，使用现有翻译
-        if english_text in existing_translations:
-            return f'{match.group(1)}{english_text}{match.group(3)}\nmsgstr "{existing_translations[english_text]}"'
-            
-        # 如果已经有翻译，保留现有翻译
-        if existing_translation:
-            return match.group(0)
-            
-        # 判断是否需要翻译
-        if not should_translate(english_text):
-            return match.group(0)
-            
+        log(f"发现现有翻译文件: {output_file}")
+        module_translations = load_existing_translations(output_file)
+        existing_translations.update(module_translations)
+        log(f"已加载 {len(module_translations)} 个现有翻译")
+        
+    # 空文件无法建立内存映射，也没有需要翻译的内容
+    if not os.path.getsize(input_file):
+        log(f"输入文件为空: {input_file}")
+        return
+    
+    if isinstance(translator, CloudTranslator):
+        batch_limits = (CLOUD_MAX_BATCH_CHARS, CLOUD_MAX_BATCH_ITEMS)
+    else:
+        batch_limits = (MAX_BATCH_CHARS, None)
+    
+    # 以内存映射方式读取源文件，只解码匹配到的词条，不把整个文件复制成字符串
+    with open(input_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+        # 第一遍：扫描一次源文件，记录每个词条的位置和内容，写回时不再重新匹配
+        entries = [(m, unquote(m.group('msgid')), unquote(m.group('msgstr')))
+                   for m in ENTRY_PATTERN.finditer(content)]
+        
+        # 收集需要翻译的词条（排除已翻译和不需要翻译的词条），先做开销小的判断
+        to_translate = [msgid for _, msgid, msgstr in entries
+                        if not msgstr  # msgstr为空
+                        and msgid not in existing_translations  # 不在现有翻译中
+                        and should_translate(msgid)]
+        
+        # 相同的msgid只翻译一次，结果应用到所有出现的位置
+        total_entries = len(to_translate)
+        to_translate = list(dict.fromkeys(to_translate))
+        
+        log(f"共发现 {total_entries} 个需要翻译的词条（去重后 {len(to_translate)} 个）")
+        
+        cache = open_cache()
         try:
-            # 翻译成中文
-            chinese_text = translator.translate(english_text, dest='zh-cn').text
+            # 优先使用缓存中的翻译，只有缓存未命中的词条才需要请求翻译接口
+            new_translations = {}
+            for english_text in to_translate:
+                row = cache.execute('SELECT zh FROM cache WHERE en = ?', (english_text,)).fetchone()
+                if row:
+                    new_translations[english_text] = row[0]
+            cached_count = len(new_translations)
+            if cached_count:
+                log(f"从缓存中获取 {cached_count} 个翻译")
             
-            # 将翻译结果中的中文引号替换回英文引号
-            chinese_text = chinese_text.replace('“', '"').replace('”', '"')
-            chinese_text = chinese_text.replace('‘', "'").replace('’', "'")
-
-            # 修复换行符，确保保持 \n 的格式
-            chinese_text = chinese_text.replace('\ n', '\n').replace(' \n', '\n')
-            
-            # 添加延迟以避免请求过快
-            time.sleep(0.3)
+            # 其他模块已完成的词条直接使用，正在翻译的词条等待其结果，其余词条由本模块认领并请求；
+            # 负责翻译的模块失败时，等待的词条在下一轮重新认领
+            shared_count = 0
+            pending = [t for t in to_translate if t not in new_translations]
+            while pending:
+                claimed, waiting, finished = claim_translations(pending)
+                new_translations.update(finished)
+                shared_count += len(finished)
+                try:
+                    # 第二遍：按批次翻译，每批只发送一次请求，多个批次并发进行
+                    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+                        futures = {executor.submit(translate_batch, translator, batch): batch
+                                   for batch in split_batches(claimed, *batch_limits)}
+                        for future in as_completed(futures):
+                            batch = futures[future]
+                            try:
+                                chinese_texts = future.result()
+                            except Exception as e:
+                                log(f"批量翻译出错，本批 {len(batch)} 个词条未翻译")
+                                log(f"错误信息: {str(e)}")
+                                continue
+                            
+                            with cache:
+                                for english_text, chinese_text in zip(batch, chinese_texts):
+                                    new_translations[english_text] = chinese_text
+                                    cache.execute('INSERT OR REPLACE INTO cache (en, zh) VALUES (?, ?)',
+                                                  (english_text, chinese_text))
+                                    log(f"[{len(new_translations)}/{len(to_translate)}] 翻译: {english_text} -> {chinese_text}")
+                finally:
+                    release_translations(claimed, new_translations)
+                
+                for event in waiting.values():
+                    event.wait()
+                pending = list(waiting)
+            if shared_count:
+                log(f"从其他模块获取 {shared_count} 个翻译")
+        finally:
+            cache.close()
+        
+        def translate_entry(match, english_text, existing_translation):
+            # msgid为空的是文件头，只在这里修改文件头信息，不扫描整个文件
+            if not english_text:
+                return set_language_header(match.group(0))
             
-            current_count += 1
-            print(f"[{current_count}/{total_untranslated}] 翻译: {english_text} -> {chinese_text}")
+            # 如果在本模块现有的翻译文件中找到，使用现有翻译
+            if english_text in module_translations:
+                msgstr = module_translations[english_text]
+            # 如果已经有翻译，保留现有翻译
+            elif existing_translation:
+                return match.group(0)
+            # 其他模块的翻译只用于填充空的msgstr，不覆盖源文件中已有的翻译
+            elif english_text in existing_translations:
+                msgstr = existing_translations[english_text]
+            # 使用本次翻译的结果
+            elif english_text in new_translations:
+                msgstr = escape_translation(new_translations[english_text])
+            else:
+                return match.group(0)
             
-            return f'{match.group(1)}{english_text}{match.group(3)}\nmsgstr "{chinese_text}"'
-        except Exception as e:
-            print(f"翻译出错: {english_text}")
-            print(f"错误信息: {str(e)}")
-            return match.group(0)
-    
-    # 计算需要翻译的总数（排除已翻译和不需要翻译的词条）
-    matches = list(re.finditer(pattern, content, flags=re.DOTALL))
-    total_untranslated = sum(1 for m in matches 
-                            if should_translate(m.group(2)) 
-                            and not m.group(5)  # msgstr为空
-                            and m.group(2) not in existing_translations)  # 不在现有翻译中
-    current_count = 0
-    
-    print(f"共发现 {total_untranslated} 个需要翻译的词条")
-    
-    # 替换所有匹配项
-    translated_content = re.sub(pattern, translate_match, content, flags=re.DOTALL)
-    
-    # 修改文件头信息
-    translated_content = translated_content.replace(
-        '"Project-Id-Version: Odoo Server',
-        '"Project-Id-Version: Odoo Server\n"'
-        '"Language: zh_CN\\n"'
-    )
+            return (b'msgid ' + match.group('msgid') + match.group('eol')
+                    + f'\nmsgstr "{msgstr}"'.encode('utf-8'))
+        
+        # 按第一遍记录的位置拼接输出内容，词条之间的注释等原样保留
+        parts = []
+        last_end = 0
+        for match, english_text, existing_translation in entries:
+            parts.append(content[last_end:match.start()])
+            parts.append(translate_entry(match, english_text, existing_translation))
+            last_end = match.end()
+        parts.append(content[last_end:])
     
     # 确保输出目录存在
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
     
-    # 保存翻译后的文件
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(translated_content)
+    # 保存翻译后的文件，各部分直接依次写入，不再拼接成完整内容
+    with open(output_file, 'wb') as f:
+        f.writelines(parts)
         
-    # 显示最终统计信息
-    print(f"\n翻译统计:")
-    print(f"总词条数: {total_untranslated}")
-    print(f"成功翻译: {current_count}")
-    print(f"未翻译/失败: {total_untranslated - current_count}")
+    # 根据翻译结果显示最终统计信息
+    attempted = len(to_translate)
+    succeeded = len(new_translations)
+    log(f"\n翻译统计:")
+    log(f"总词条数: {attempted}")
+    log(f"成功翻译: {succeeded}（其中 {cached_count} 个来自缓存，{shared_count} 个来自其他模块）")
+    log(f"未翻译/失败: {attempted - succeeded}")
     
     # 如果有未翻译的词条，给出提示
-    if current_count < total_untranslated:
-        print("\n注意: 有部分词条未能成功翻译，请检查输出文件并手动处理这些词条。")
+    if succeeded < attempted:
+        log("\n注意: 有部分词条未能成功翻译，请检查输出文件并手动处理这些词条。")
+
+def translate_module(module_dir, pot_path, translator, shared_translations=None):
+    """
+    翻译单个模块的POT文件，结果保存为模块i18n目录下的zh_CN.po
+    
+    Args:
+        module_dir (str): 模块目录路径
+        pot_path (str): POT文件路径
+        translator (Translator | CloudTranslator): 翻译器实例
+        shared_translations (dict): 其他模块已有的翻译
+    """
+    module_name = os.path.basename(module_dir)
+    output_path = os.path.join(module_dir, "i18n", "zh_CN.po")
+    
+    # 多个模块并行翻译，每行输出前加上模块名，并逐条加锁输出，避免不同模块的输出混在一行
+    def log(message=''):
+        with _print_lock:
+            for line in message.split('\n'):
+                print(f"[{module_name}] {line}")
+    
+    log(f"正在翻译模块: {module_name}")
+    log(f"输入文件: {pot_path}")
+    log(f"输出文件: {output_path}")
+    
+    translate_po_file(pot_path, output_path, translator, shared_translations, log)
+    log(f"模块 {module_name} 翻译完成")
 
 def main():
     parser = argparse.ArgumentParser(description='将PO文件从英文翻译成中文')
@@ -257,6 +862,12 @@ def main():
             module_name = os.path.basename(module_dir)
             print(f"- {module_name}")
         
+        # 读取所有模块已有的翻译，供其他模块直接复用，同时写入缓存供之后的运行使用
+        shared_translations = load_module_translations(pot_files)
+        seed_cache(shared_translations)
+        if shared_translations:
+            print(f"\n已从现有的zh_CN.po中加载 {len(shared_translations)} 个可复用的翻译")
+        
         # 如果指定了模块名，只翻译指定模块
         if args.module:
             pot_files = [(d, p) for d, p in pot_files if os.path.basename(d) == args.module]
@@ -266,17 +877,14 @@ def main():
         
         print("\n开始翻译...")
         
-        # 遍历翻译每个模块
-        for module_dir, pot_path in pot_files:
-            module_name = os.path.basename(module_dir)
-            output_path = os.path.join(module_dir, "i18n", "zh_CN.po")
-            
-            print(f"\n正在翻译模块: {module_name}")
-            print(f"输入文件: {pot_path}")
-            print(f"输出文件: {output_path}")
-            
-            translate_po_file(pot_path, output_path)
-            print(f"模块 {module_name} 翻译完成")
+        # 各模块相互独立，使用线程池并行翻译，所有模块共用一个翻译器及其HTTP连接
+        translator = create_translator()
+        try:
+            with ThreadPoolExecutor(max_workers=MAX_PARALLEL_MODULES) as executor:
+                list(executor.map(lambda item: translate_module(*item, translator, shared_translations),
+                                  pot_files))
+        finally:
+            close_translator(translator)
         
         print("\n所有模块翻译完成！")
         